@@ -1,7 +1,11 @@
-import collections
+import atexit
+import functools
 import html
 import os
 import shutil
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum, IntEnum
 
@@ -10,6 +14,7 @@ from rich.console import Console
 from rich.table import Table
 
 from .environment import env
+from .log import logger
 from .output import output
 from .template_env import LOADED_SUMMARY_TEMPLATE
 
@@ -38,74 +43,165 @@ class TestStatus(Enum):
 NOT_APPLICABLE = "N/A"
 
 
+@dataclass
+class TestcaseRecord:
+    """Summary state of one testcase."""
+
+    # declared by hand, dataclass(slots=True) needs python 3.10
+    __slots__ = ("status", "res", "reported", "passed")
+
+    status: TestStatus
+    res: tuple
+    reported: bool
+    passed: bool
+
+
+OUTPUT_FILENAME_MAPPING = {
+    OutputFileType.SUMMARY: "summary.html",
+    OutputFileType.BRIEF_SUMMARY: "brief_summary.txt",
+    OutputFileType.FAILED_TESTSCRIPT: "failed_testscripts.txt",
+    OutputFileType.FAILED_COMMAND: "failed_commands.txt",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _compose_output_filename(directory_path, output_type):
+    # pylint: disable=unused-argument
+    return output.compose_summary_file(OUTPUT_FILENAME_MAPPING[output_type])
+
+
 def get_output_filename(output_type):
-    mapping = {
-        OutputFileType.SUMMARY: "summary.html",
-        OutputFileType.BRIEF_SUMMARY: "brief_summary.txt",
-        OutputFileType.FAILED_TESTSCRIPT: "failed_testscripts.txt",
-        OutputFileType.FAILED_COMMAND: "failed_commands.txt",
-    }
-    return output.compose_summary_file(mapping[output_type])
+    # keyed by the output directory as the folder suffix may be updated
+    # after the summary singleton is created
+    return _compose_output_filename(output.directory_path, output_type)
 
 
 class Summary:
 
     SCRIPT_LINE_MSG_TEMPLATE = "{script_id:15}{script:64}{comment}"
+    FLUSH_INTERVAL = 2.0  # seconds between two throttled summary.html renders
+    MAX_HTML_LINE_LENGTH = 100
 
     def __init__(self):
-        self.testscripts = collections.defaultdict(tuple)
-        self.testcases = collections.defaultdict(tuple)
+        self.testscripts = {}  # script id: (status, duration)
+        self.testcases = {}  # testcase id: TestcaseRecord
         self.start_time = datetime.now().replace(microsecond=0)
         self.end_time = NOT_APPLICABLE
         self.qaid_script_mapping = {}
+        self._classified_testcases = {}  # testcase id: classified result
+        self._dirty = False
+        self._last_flush = float("-inf")
+        self._flush_lock = threading.Lock()
+        self._append_files = {}
+        self._cwd = os.getcwd()
+        self._relpaths = {}  # source filepath: path relative to self._cwd
+        atexit.register(self._flush_at_exit)
+        atexit.register(self._close_append_files)
 
     def add_qaid_script_mapping(self, qaid, source_filepath):
-        self.qaid_script_mapping[qaid] = os.path.relpath(source_filepath, os.getcwd())
+        # one script usually maps to many qaids, resolve its relpath only once
+        relpath = self._relpaths.get(source_filepath)
+        if relpath is None:
+            relpath = os.path.relpath(source_filepath, self._cwd)
+            self._relpaths[source_filepath] = relpath
+        self.qaid_script_mapping[qaid] = relpath
 
     def add_testcase(self, id_, source_filepath):
         self.add_qaid_script_mapping(id_, source_filepath)
-        self.testcases[id_] = (TestStatus.NOT_TESTED, (), False)
-        self._generate()
+        self.testcases[id_] = TestcaseRecord(TestStatus.NOT_TESTED, (), False, False)
+        self._classified_testcases.pop(id_, None)
+        self._mark_dirty()
+
+    def _set_testcase_result(self, id_, res, reported):
+        passed = all(succeeded for succeeded, *_ in res)
+        self.testcases[id_] = TestcaseRecord(TestStatus.TESTED, res, reported, passed)
+        self._classified_testcases.pop(id_, None)
 
     def update_testcase(self, id_, res, reported):
-        self.testcases[id_] = (TestStatus.TESTED, res, reported)
-        self._generate()
+        self._set_testcase_result(id_, res, reported)
+        self._mark_dirty()
+
+    def batch_update_testcases(self, updates):
+        """Record (id_, res, reported) results, marking the summary dirty once."""
+        for id_, res, reported in updates:
+            self._set_testcase_result(id_, res, reported)
+        if updates:
+            self._mark_dirty()
 
     def update_reported(self, id_):
-        status, res, _ = self.testcases[id_]
-        self.testcases[id_] = (status, res, True)
-        self._generate()
+        self.testcases[id_].reported = True
+        if id_ in self._classified_testcases:
+            self._classified_testcases[id_]["reported"] = True
+        self._mark_dirty()
 
     def add_testscript(self, script):
         self.add_qaid_script_mapping(script.id, script.source_file)
         self.testscripts[script.id] = (TestStatus.NOT_TESTED, NOT_APPLICABLE)
-        self._generate()
+        self._mark_dirty()
 
     def update_testscript(self, id_, status, duration=NOT_APPLICABLE):
         self.testscripts[id_] = (status, duration)
-        self._generate()
+        # script status changes mark the start/end of a script run, publish
+        # them right away so the portal never shows a stale status for a
+        # whole script execution
+        self._mark_dirty(force=True)
 
     def update_testscript_duration(self, id_, duration):
         status, _ = self.testscripts[id_]
         self.testscripts[id_] = (status, duration)
-        self._generate()
+        self._mark_dirty()
         return status
 
     def show_summary(self):
         self.end_time = datetime.now().replace(microsecond=0)
-        self._generate()
+        self._mark_dirty(force=True)
         self._print()
 
+    def _mark_dirty(self, force=False):
+        self._dirty = True
+        self._maybe_flush(force=force)
+
+    def _flush_at_exit(self):
+        # only catch up on a throttled render, if no render ever succeeded
+        # (nothing set up, e.g. a process that merely imported the summary)
+        # there is no page to bring up to date
+        if self._last_flush == float("-inf"):
+            return
+        try:
+            self._maybe_flush(force=True)
+        except Exception:
+            logger.exception("Failed to flush summary at exit.")
+
+    def _maybe_flush(self, force=False):
+        """Render summary.html if it is out of date.
+
+        Renders are throttled to one per FLUSH_INTERVAL unless forced.
+        """
+        if not self._dirty:
+            return
+        # a forced flush waits for a running render, a throttled one leaves
+        # its change to the next flush instead of queueing another render
+        # pylint: disable=consider-using-with
+        if not self._flush_lock.acquire(blocking=force):
+            return
+        try:
+            if not self._dirty:
+                return
+            if force or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+                self._generate()
+        finally:
+            self._flush_lock.release()
+
     def _statistic_testcases(self):
         statistics = {}
         statistics["total_number"] = len(self.testcases)
         statistics["passed_number"] = sum(
-            status is TestStatus.TESTED and all(r for r, *_ in res)
-            for status, res, *_ in self.testcases.values()
+            testcase.status is TestStatus.TESTED and testcase.passed
+            for testcase in self.testcases.values()
         )
         statistics["failed_number"] = sum(
-            status is TestStatus.TESTED and any(not r for r, *_ in res)
-            for status, res, *_ in self.testcases.values()
+            testcase.status is TestStatus.TESTED and not testcase.passed
+            for testcase in self.testcases.values()
         )
         statistics["passed_percentage"] = 100 * round(
             (
@@ -116,43 +212,37 @@ class Summary:
             2,
         )
         statistics["not_tested_number"] = sum(
-            status == TestStatus.NOT_TESTED for status, *_ in self.testcases.values()
+            testcase.status is TestStatus.NOT_TESTED
+            for testcase in self.testcases.values()
         )
 
         return statistics
 
-    @staticmethod
-    def _split_long_lines(text):
-        # Split the text into lines
-        lines = text.split("\n")
-
-        # Iterate through each line
-        for i, line in enumerate(lines):
-            # Check if the line length exceeds 100 characters
-            if len(line) > 100:
-                # Split the line into chunks of maximum 100 characters
-                chunks = [line[j : j + 100] for j in range(0, len(line), 100)]
-                # Replace the original line with the split chunks
-                lines[i : i + 1] = chunks
-
-        # Join the lines back into a single string
-        return "\n".join(lines)
-
     def _normalize_output_for_html(self, raw_output: str) -> str:
         """Normalize output for HTML by escaping special characters,
         splitting long lines, and replacing newlines with HTML line breaks."""
-        escaped_output = html.escape(raw_output)
-        normalized_output = self._split_long_lines(escaped_output)
-        return normalized_output.replace("\n", "<br>")
+        width = self.MAX_HTML_LINE_LENGTH
+        lines = []
+        append = lines.append
+        # split long lines and join with <br> in one pass over the escaped output
+        for line in html.escape(raw_output).split("\n"):
+            if len(line) > width:
+                for i in range(0, len(line), width):
+                    append(line[i : i + width])
+            else:
+                append(line)
+        return "<br>".join(lines)
 
     def _classify_testcases(self):
         results = []
-        for testcase_id, (
-            status,
-            res,
-            reported,
-        ) in self.testcases.items():
-            if status is not TestStatus.TESTED:
+        for testcase_id, testcase in self.testcases.items():
+            if testcase.status is not TestStatus.TESTED:
+                continue
+            # escaping the failed outputs is the costly part of a render,
+            # only redo it for testcases updated since the last one
+            result = self._classified_testcases.get(testcase_id)
+            if result is not None:
+                results.append(result)
                 continue
 
             details = [
@@ -162,31 +252,31 @@ class Summary:
                         [line_number, expect, self._normalize_output_for_html(output)],
                     )
                 )
-                for succeeded, line_number, expect, output in res
+                for succeeded, line_number, expect, output in testcase.res
                 if not succeeded
             ]
-            final_res = all(succeeded for succeeded, *_ in res)
             result = {
                 "id": testcase_id,
-                "res": final_res,
+                "res": testcase.passed,
                 "details": details,
-                "reported": reported,
+                "reported": testcase.reported,
             }
+            self._classified_testcases[testcase_id] = result
             results.append(result)
         return results
 
     def _render(self):
         not_tested_cases = [
             _id
-            for _id, (status, *_) in self.testcases.items()
-            if status is TestStatus.NOT_TESTED
+            for _id, testcase in self.testcases.items()
+            if testcase.status is TestStatus.NOT_TESTED
         ]
         statistics = self._statistic_testcases()
         duration = NOT_APPLICABLE
         if self.end_time != NOT_APPLICABLE:
             duration = int((self.end_time - self.start_time).total_seconds())
 
-        rendered_content = LOADED_SUMMARY_TEMPLATE.render(
+        return LOADED_SUMMARY_TEMPLATE.stream(
             env_file=env.get_env_file_name(),
             test_file=env.get_test_file_name(),
             start_time=self.start_time,
@@ -199,14 +289,28 @@ class Summary:
             **statistics,
         )
 
-        return rendered_content
-
     def _generate(self):
-        rendered_content = self._render()
         summary_filepath = get_output_filename(OutputFileType.SUMMARY)
-        with open(summary_filepath, "w+", encoding="utf-8") as f:
-            f.write(rendered_content)
-        return rendered_content
+        # publish atomically so the web portal never serves a truncated page,
+        # through a temp file of this thread's own as renders may overlap
+        tmp_filepath = f"{summary_filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # stamp the flush up front, mutations made while rendering mark the
+        # summary dirty again and are throttled against this render
+        last_flush = self._last_flush
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        try:
+            with open(tmp_filepath, "w", encoding="utf-8") as f:
+                # stream the page to disk instead of building it as one string
+                self._render().dump(f)
+            os.replace(tmp_filepath, summary_filepath)
+        except BaseException:
+            self._dirty = True
+            self._last_flush = last_flush
+            # only left behind when rendering failed halfway
+            if os.path.exists(tmp_filepath):
+                os.remove(tmp_filepath)
+            raise
 
     def _print(self):
         table = Table(title="Testcase Results")
@@ -227,6 +331,24 @@ class Summary:
         console = Console()
         console.print(table)
 
+    def _append_to_file(self, filename, content):
+        """Append to one of the text summary files through a long-lived handle.
+
+        The handles are line buffered, so every note still shows up in the
+        file right away for anyone tailing it.
+        """
+        f = self._append_files.get(filename)
+        if f is None:
+            # pylint: disable=consider-using-with
+            f = open(filename, "a", encoding="utf-8", buffering=1)
+            self._append_files[filename] = f
+        f.write(content)
+
+    def _close_append_files(self):
+        for f in self._append_files.values():
+            f.close()
+        self._append_files.clear()
+
     def write_notes_to_file(
         self, script_id, script, comment, note_type: OutputFileType
     ):
@@ -239,8 +361,7 @@ class Summary:
         failed_info = self.SCRIPT_LINE_MSG_TEMPLATE.format(
             script_id=script_id, script=script, comment=f"{comment}\n\n"
         )
-        with open(failed_commands_file_name, "a", encoding="utf-8") as f:
-            f.write(failed_info)
+        self._append_to_file(failed_commands_file_name, failed_info)
         # add failure or error to to brief summary
         if note_type is OutputFileType.FAILED_TESTSCRIPT:
             self.dump_str_to_brief_summary(f"##### Expect Failures:{comment}")
@@ -249,14 +370,14 @@ class Summary:
 
     def dump_str_to_brief_summary(self, comment):
         brief_summary_file_name = get_output_filename(OutputFileType.BRIEF_SUMMARY)
-        with open(brief_summary_file_name, "a", encoding="utf-8") as f:
-            f.write(f"{comment}\n")
+        self._append_to_file(brief_summary_file_name, f"{comment}\n")
 
     def dump_script_start_time_to_brief_summary(self):
         brief_summary_file_name = get_output_filename(OutputFileType.BRIEF_SUMMARY)
-        with open(brief_summary_file_name, "a", encoding="utf-8") as f:
-            current_time = datetime.now().replace(microsecond=0)
-            f.write(f"# Current Time: {current_time}\n")
+        current_time = datetime.now().replace(microsecond=0)
+        self._append_to_file(
+            brief_summary_file_name, f"# Current Time: {current_time}\n"
+        )
 
 
 summary = Summary()
@@ -158,10 +158,12 @@ class OrioleClient:
         return report
 
     def report(self, testcase_id, is_passed, device_info):
+        if not testcase_id.isdigit():
+            return
         product_report = self.generate_product_report(
             testcase_id, is_passed, device_info
         )
-        if product_report and testcase_id.isdigit():
+        if product_report:
             self.release_tag = (
                 env.get_section_var("ORIOLE", "RELEASE") or device_info["version"]
             )
@@ -36,6 +36,7 @@ class ScriptResultManager:
         "invalid input",
         "duplicated with another vip",
     )
+    _CLI_ERROR_RE = re.compile("|".join(CLI_ERROR_PATTERNS))
 
     def __init__(self, script):
         self.script = script
@@ -60,20 +61,17 @@ class ScriptResultManager:
             self.report_qaid_and_dev_map[qaid] = dut
 
     def check_cli_error(self, line_number, command, result):
-        failed_pattern = "|".join(ScriptResultManager.CLI_ERROR_PATTERNS)
-        m = re.search(failed_pattern, result)
+        m = ScriptResultManager._CLI_ERROR_RE.search(result)
         if m:
             error = m.group()
             self.cli_errors.append((line_number, command, error))
 
     def get_formatted_command_errors(self):
-        if not self.cli_errors:
-            return ""
-        errors = "\n".join(
-            f"# Line {line_number: 4}: {command}  <== {error}"
-            for line_number, command, error in self.cli_errors
-        )
-        return errors
+        errors = []
+        append = errors.append
+        for line_number, command, error in self.cli_errors:
+            append("# Line % 4d: %s  <== %s" % (line_number, command, error))
+        return "\n".join(errors)
 
     def add_qaid_expect_result(self, qaid, is_succeeded, line_number, cli_output):
         expect_statement = self.script.get_script_line(line_number)
@@ -87,21 +85,22 @@ class ScriptResultManager:
         )
 
     def _get_failure_details(self):
-        return "\n".join(
-            f"# Line {line_number: 4}: {line}"
-            for _, details in self.expect_result.items()
-            for result, line_number, line, _ in details
-            if not result
-        )
+        failures = []
+        append = failures.append
+        for details in self.expect_result.values():
+            for result, line_number, line, _ in details:
+                if not result:
+                    append("# Line % 4d: %s" % (line_number, line))
+        return "\n".join(failures)
 
     def get_brief_result(self):
-        failure_lines = " ".join(
-            f"{line_number}"
-            for _, details in self.expect_result.items()
-            for result, line_number, *_ in details
-            if not result
-        )
-        return f"FAILED {failure_lines}" if failure_lines else "PASSED"
+        failure_lines = []
+        append = failure_lines.append
+        for details in self.expect_result.values():
+            for result, line_number, *_ in details:
+                if not result:
+                    append(str(line_number))
+        return f"FAILED {' '.join(failure_lines)}" if failure_lines else "PASSED"
 
     def is_a_valid_testcase(self, testcase_id):
         return testcase_id in self.expect_result
@@ -111,29 +110,40 @@ class ScriptResultManager:
             return False
         return all(result for result, *_ in self.expect_result[qaid])
 
-    def report_qaid_result_to_roiole(self, qaid, device_info):
+    def report_qaid_result_to_roiole(self, qaid, device_info, summary_updates=None):
         is_succeeded = self.is_qaid_succeeded(qaid)
         test_status = TestStatus.PASSED if is_succeeded else TestStatus.FAILED
         logger.info("Testcase %s %s", qaid, test_status)
         result = oriole.report(qaid, is_succeeded, device_info)
-        summary.update_testcase(qaid, self.expect_result[qaid], result)
+        if summary_updates is None:
+            summary.update_testcase(qaid, self.expect_result[qaid], result)
+        else:
+            summary_updates.append((qaid, self.expect_result[qaid], result))
         return is_succeeded
 
     def report_script_result_to_oriole(self, collected_device_info):
         is_script_succeeded = True
-        for qaid in self.expect_result:
-            if qaid not in self.report_qaid_and_dev_map:
-                error_msg = f"** QAID - {qaid} in Expect without 'report' ***\n"
-                summary.dump_str_to_brief_summary(error_msg)
-                logger.warning("\n%s", error_msg)
-                continue
-            if qaid in self.dev_info_requested_by_user:
-                dut_info = self.dev_info_requested_by_user[qaid]
-            else:
-                dev = self.report_qaid_and_dev_map[qaid]
-                dut_info = collected_device_info[dev]
-            if not self.report_qaid_result_to_roiole(qaid, dut_info):
-                is_script_succeeded = False
+        # update the summary once for the whole script instead of per qaid
+        summary_updates = []
+        try:
+            for qaid in self.expect_result:
+                if qaid not in self.report_qaid_and_dev_map:
+                    error_msg = f"** QAID - {qaid} in Expect without 'report' ***\n"
+                    summary.dump_str_to_brief_summary(error_msg)
+                    logger.warning("\n%s", error_msg)
+                    continue
+                if qaid in self.dev_info_requested_by_user:
+                    dut_info = self.dev_info_requested_by_user[qaid]
+                else:
+                    dev = self.report_qaid_and_dev_map[qaid]
+                    dut_info = collected_device_info[dev]
+                if not self.report_qaid_result_to_roiole(
+                    qaid, dut_info, summary_updates
+                ):
+                    is_script_succeeded = False
+        finally:
+            # keep the results of the qaids already reported if one fails
+            summary.batch_update_testcases(summary_updates)
         return is_script_succeeded
 
     def report_script_result(self, collected_device_info):
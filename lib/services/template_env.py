@@ -13,7 +13,12 @@ from jinja2 import Environment, FileSystemLoader
 TEMPLATE_FILE_DIR = str(Path(__file__).parent / "static")
 
 # Create Jinja2 environment for static templates
-web_server_env = Environment(loader=FileSystemLoader(TEMPLATE_FILE_DIR))
+# Templates never change while autotest runs, so skip the up-to-date checks
+web_server_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_FILE_DIR),
+    auto_reload=False,
+    cache_size=-1,
+)
 
 # Pre-load summary template for performance
 TEMPLATE_FILENAME = "summary.template"
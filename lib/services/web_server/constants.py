@@ -4,30 +4,34 @@ DEFAULT_TAIL_LINES = 1000
 DEFAULT_HEAD_LINES = 1000
 MAX_VIEWABLE_SIZE = 10 * 1024 * 1024  # 10MB per chunk
 
-# File reader block size
-BLOCK_SIZE = 4096  # Block size for backward reading
+# Line index granularity, one indexed line start per block
+LINE_INDEX_BLOCK_SIZE = 1024 * 1024  # 1MB
+
+# Characters decoded per read when collecting head/range lines
+TEXT_READ_CHUNK_SIZE = 64 * 1024
 
 # Viewable file patterns
 VIEWABLE_TESTFILE_PREFIX = ("grp.",)
 
-VIEWABLE_TESTFILE_EXTENSION = (
-    ".log",
-    ".txt",
-    ".env",
-    ".vm",
-    "",
-    ".conf",
-    ".full",
-    ".crit",
-    ".grp",
-    ".html",
-    ".py",
-    ".md",
-    ".json",
-    ".yaml",
-    ".sh",
-    ".spec",
-    ".yml",
-    ".yaml",
-    ".toml",
+VIEWABLE_TESTFILE_EXTENSION = frozenset(
+    {
+        ".log",
+        ".txt",
+        ".env",
+        ".vm",
+        "",
+        ".conf",
+        ".full",
+        ".crit",
+        ".grp",
+        ".html",
+        ".py",
+        ".md",
+        ".json",
+        ".yaml",
+        ".sh",
+        ".spec",
+        ".yml",
+        ".toml",
+    }
 )
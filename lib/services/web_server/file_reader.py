@@ -1,24 +1,83 @@
+import bisect
+import functools
+import io
+import mmap
 import os
+import signal
 import subprocess
+import threading
 import time
 
 from ..log import logger
 from .constants import (
-    BLOCK_SIZE,
     DEFAULT_HEAD_LINES,
     DEFAULT_TAIL_LINES,
+    LINE_INDEX_BLOCK_SIZE,
     MAX_VIEWABLE_SIZE,
+    TEXT_READ_CHUNK_SIZE,
 )
 
 
-class FileReader:
+class LineIndex:
+    """Sparse index of line start offsets, one per LINE_INDEX_BLOCK_SIZE bytes
+
+    It is only built as far into the file as lookups have needed. Line numbers
+    follow text mode iteration, where a lone "\\r" ends a line as well.
+    """
+
+    def __init__(self):
+        self._lines = [1]  # number of the line starting at the matching offset
+        self._offsets = [0]
+        self._complete = False
+        self._lock = threading.Lock()
+
+    def find(self, f, line_number):
+        """Find the closest indexed line at or before line_number
+
+        Args:
+            f: Open file handle (in binary mode) of the indexed file
+            line_number: Line number to look up
 
-    BLOCK_SIZE = BLOCK_SIZE
+        Returns:
+            tuple: (indexed_line_number, byte_offset)
+        """
+        with self._lock:
+            while not self._complete and self._lines[-1] < line_number:
+                self._complete = not self._index_next_block(f)
+            i = max(0, bisect.bisect_right(self._lines, line_number) - 1)
+            return self._lines[i], self._offsets[i]
+
+    def _index_next_block(self, f):
+        """Index the line start after the next block, False at end of file"""
+        f.seek(self._offsets[-1])
+        block = f.read(LINE_INDEX_BLOCK_SIZE)
+        # Only index up to the last newline so the block ends at a line start
+        end = block.rfind(b"\n") + 1
+        if not end:
+            # A line longer than the block, take the rest of it
+            block += f.readline()
+            if not block.endswith(b"\n"):
+                return False
+            end = len(block)
+        lines = block.count(b"\n", 0, end)
+        # "\r\n" ends one line, a lone "\r" ends one as well
+        carriage_returns = block.count(b"\r", 0, end)
+        if carriage_returns:
+            lines += carriage_returns - block.count(b"\r\n", 0, end)
+        self._lines.append(self._lines[-1] + lines)
+        self._offsets.append(self._offsets[-1] + end)
+        return True
+
+
+class FileReader:
 
     @staticmethod
     def _read_backwards_until_lines(f, file_size, num_lines, encoding):
         """Read file backwards until we have enough lines
 
+        The file is memory mapped and scanned backwards for newlines, only the
+        tail holding the wanted lines is decoded, and only once.
+
         Args:
             f: Open file handle (in binary mode)
             file_size: Total size of file in bytes
@@ -28,41 +87,24 @@ class FileReader:
         Returns:
             tuple: (lines_list, bytes_read)
         """
-        start_time = time.time()
-
-        blocks = []
-        bytes_read = 0
-        lines = []
-
-        while bytes_read < file_size:
-            # Calculate chunk size for this iteration
-            chunk_size = min(FileReader.BLOCK_SIZE, file_size - bytes_read)
-
-            # Read block from file
-            f.seek(file_size - bytes_read - chunk_size)
-            block = f.read(chunk_size)
-            blocks.insert(0, block)
-            bytes_read += chunk_size
-
-            # Decode and split into lines
-            try:
-                text = b"".join(blocks).decode(encoding)
-                lines = text.split("\n")
-
-                # Remove trailing empty string if text ends with newline
-                if lines and lines[-1] == "":
-                    lines.pop()
-
-                # Early termination: stop when we have enough lines
-                if len(lines) > num_lines:
+        start_time = time.perf_counter()
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # A trailing newline ends the last line instead of starting a new one,
+            # look at the measured size as a live log may have grown since
+            end = file_size - 1 if mm[file_size - 1 : file_size] == b"\n" else file_size
+            pos = end
+            for _ in range(num_lines):
+                pos = mm.rfind(b"\n", 0, pos)
+                if pos == -1:
                     break
+            # Cut right after a newline, a multi-byte char is never split
+            text = mm[pos + 1 : end].decode(encoding)
 
-            except UnicodeDecodeError:
-                # Continue reading if multi-byte char split across blocks
-                if bytes_read >= file_size:
-                    raise  # Can't decode entire file
+        lines = text.split("\n")
+        bytes_read = file_size - (pos + 1)
 
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         logger.debug(
             "Read backwards: %d bytes, %d lines, encoding=%s, time=%.3fs",
             bytes_read,
@@ -104,7 +146,7 @@ class FileReader:
         Returns:
             tuple: (content, start_line_number)
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
             with open(filepath, "rb") as f:
@@ -131,7 +173,7 @@ class FileReader:
                 )
                 start_line = max(1, total_lines - len(result_lines) + 1)
 
-                elapsed = time.time() - start_time
+                elapsed = time.perf_counter() - start_time
                 logger.debug(
                     "read_file_tail: %s - %d lines (start=%d, total=%s), time=%.3fs",
                     filepath,
@@ -147,6 +189,57 @@ class FileReader:
             logger.error("Error reading tail of file %s: %s", filepath, e)
             raise
 
+    @staticmethod
+    def _find_nth_newline(text, n, start=0):
+        pos = start - 1
+        for _ in range(n):
+            pos = text.find("\n", pos + 1)
+        return pos
+
+    @staticmethod
+    def _read_lines(f, num_lines, skip_lines=0):
+        """Read lines in large chunks instead of line by line
+
+        Args:
+            f: Open file handle (in text mode)
+            num_lines: Number of lines to read
+            skip_lines: Number of lines to skip before reading
+
+        Returns:
+            tuple: (content, lines_read), content joins the lines with "\\n"
+        """
+        chunks = []
+        remaining = num_lines
+        while remaining > 0:
+            chunk = f.read(TEXT_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            start = 0
+            if skip_lines:
+                newlines = chunk.count("\n")
+                if newlines < skip_lines:
+                    skip_lines -= newlines
+                    continue
+                start = FileReader._find_nth_newline(chunk, skip_lines) + 1
+                skip_lines = 0
+            newlines = chunk.count("\n", start)
+            if newlines >= remaining:
+                end = FileReader._find_nth_newline(chunk, remaining, start)
+                chunks.append(chunk[start:end])
+                remaining = 0
+            else:
+                chunks.append(chunk[start:])
+                remaining -= newlines
+        content = "".join(chunks)
+        lines_read = num_lines - remaining
+        if remaining > 0 and content:
+            # The file ended first, its last line may have no newline
+            if content.endswith("\n"):
+                content = content[:-1]
+            else:
+                lines_read += 1
+        return content, max(lines_read, 0)
+
     @staticmethod
     def read_file_head(filepath, num_lines=DEFAULT_HEAD_LINES, encoding="utf-8"):
         """Read first N lines from a file
@@ -154,22 +247,17 @@ class FileReader:
         Returns:
             tuple: (content, start_line_number, total_lines)
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
-            lines = []
             with open(filepath, "r", encoding=encoding) as f:
-                for i, line in enumerate(f):
-                    if i >= num_lines:
-                        break
-                    lines.append(line.rstrip("\n"))
-            content = "\n".join(lines)
+                content, lines_read = FileReader._read_lines(f, num_lines)
 
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             logger.debug(
                 "read_file_head: %s - %d lines, time=%.3fs",
                 filepath,
-                len(lines),
+                lines_read,
                 elapsed,
             )
 
@@ -186,26 +274,30 @@ class FileReader:
         Returns:
             tuple: (content, start_line_number)
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
-            lines = []
-            with open(filepath, "r", encoding=encoding) as f:
-                for i, line in enumerate(f, start=1):
-                    if i < start_line:
-                        continue
-                    if i > end_line:
-                        break
-                    lines.append(line.rstrip("\n"))
-            content = "\n".join(lines)
-
-            elapsed = time.time() - start_time
+            with open(filepath, "rb") as f:
+                # Skip ahead to the closest indexed line instead of iterating
+                # over every line before start_line
+                st = os.fstat(f.fileno())
+                line_index = _line_index_cached(filepath, st.st_size, st.st_mtime_ns)
+                first_line, offset = line_index.find(f, start_line)
+                f.seek(offset)
+                first_wanted = max(start_line, first_line)
+                content, lines_read = FileReader._read_lines(
+                    io.TextIOWrapper(f, encoding=encoding),
+                    end_line - first_wanted + 1,
+                    skip_lines=first_wanted - first_line,
+                )
+
+            elapsed = time.perf_counter() - start_time
             logger.debug(
                 "read_file_range: %s - lines %d-%d (%d lines), time=%.3fs",
                 filepath,
                 start_line,
                 end_line,
-                len(lines),
+                lines_read,
                 elapsed,
             )
 
@@ -217,11 +309,21 @@ class FileReader:
 
     @staticmethod
     def search_in_file(filepath, pattern, context_lines=5):
-        start_time = time.time()
+        """Search a file with grep, showing line numbers and context
+
+        Output beyond MAX_VIEWABLE_SIZE is cut off and grep is stopped there,
+        a pattern matching most of a large log would otherwise be held in
+        memory several times over.
+
+        Returns:
+            str: grep output, None if nothing matched
+        """
+        start_time = time.perf_counter()
 
         try:
             cmd = [
                 "grep",
+                "-a",  # Search non-utf-8 bytes too instead of stopping at them
                 "-n",  # Line numbers
                 f"-C{context_lines}",  # Context lines
                 "-E",  # Extended regex
@@ -229,26 +331,51 @@ class FileReader:
                 pattern,
                 filepath,
             ]
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, check=False, timeout=30
-            )
-
-            elapsed = time.time() - start_time
+            with subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            ) as proc:
+                timer = threading.Timer(30, proc.kill)
+                timer.start()
+                try:
+                    output = proc.stdout.read(MAX_VIEWABLE_SIZE + 1)
+                    truncated = len(output) > MAX_VIEWABLE_SIZE
+                    if truncated:
+                        proc.kill()
+                    stderr = proc.stderr.read()
+                    returncode = proc.wait()
+                finally:
+                    timer.cancel()
+
+            elapsed = time.perf_counter() - start_time
             logger.debug(
                 "search_in_file: %s - pattern='%s', returncode=%d, time=%.3fs",
                 filepath,
                 pattern,
-                result.returncode,
+                returncode,
                 elapsed,
             )
 
-            if result.returncode == 0:
-                return result.stdout
-            if result.returncode == 1:
-                return None
-            raise RuntimeError(f"grep failed: {result.stderr}")
-        except subprocess.TimeoutExpired as e:
-            raise TimeoutError("Search timeout (30s exceeded)") from e
+            if not truncated:
+                if returncode == -signal.SIGKILL:
+                    raise TimeoutError("Search timeout (30s exceeded)")
+                if returncode == 1:
+                    return None
+                if returncode != 0:
+                    stderr = stderr.decode("utf-8", errors="replace")
+                    raise RuntimeError(f"grep failed: {stderr}")
+            else:
+                # Only show whole lines
+                output = output[: output.rfind(b"\n", 0, MAX_VIEWABLE_SIZE) + 1]
+
+            # Same newline handling as reading the output in text mode
+            content = output.decode("utf-8", errors="replace")
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+            if truncated:
+                content += (
+                    f"[Search output truncated at {MAX_VIEWABLE_SIZE} bytes,"
+                    " refine the pattern to see all matches]\n"
+                )
+            return content
         except Exception as e:
             logger.error("Error searching file %s: %s", filepath, e)
             raise e
@@ -304,13 +431,39 @@ class FileReader:
         except Exception as e:
             raise last_error from e
 
+    @staticmethod
+    def get_size_and_line_count(filepath):
+        """Get file size and line count from a single stat
+
+        Line counts are cached until the file size or mtime changes.
+
+        Returns:
+            tuple: (file_size, total_lines), total_lines is None on error
+        """
+        st = os.stat(filepath)
+        try:
+            count = _count_lines_cached(filepath, st.st_size, st.st_mtime_ns)
+        except Exception as e:
+            logger.warning("Error counting lines in %s: %s", filepath, e)
+            count = None
+        return st.st_size, count
+
     @staticmethod
     def count_lines(filepath):
         """Count total lines in a file efficiently
 
         Returns the number of lines matching Python's file iteration behavior.
         """
-        start_time = time.time()
+        try:
+            return FileReader.get_size_and_line_count(filepath)[1]
+        except Exception as e:
+            logger.warning("Error counting lines in %s: %s", filepath, e)
+            return None
+
+    @staticmethod
+    def _count_lines_uncached(filepath, file_size):
+        """Count total lines in a file, raises on error"""
+        start_time = time.perf_counter()
 
         def _count_lines(filepath):
             count = 0
@@ -319,61 +472,70 @@ class FileReader:
                     count += 1
             return count
 
-        try:
-            # For files < 1MB, use direct Python counting (fast and accurate)
-            file_size = os.path.getsize(filepath)
-            if file_size < 1024 * 1024:  # 1MB
-                count = _count_lines(filepath)
-                elapsed = time.time() - start_time
-                logger.debug(
-                    "count_lines: %s - %d lines (Python method), time=%.3fs",
-                    filepath,
-                    count,
-                    elapsed,
-                )
-                return count
-
-            # For larger files, use wc -l with adjustment for Python semantics
-            result = subprocess.run(
-                ["wc", "-l", filepath],
-                capture_output=True,
-                text=True,
-                check=False,
-                timeout=10,
+        # For files < 1MB, use direct Python counting (fast and accurate)
+        if file_size < 1024 * 1024:  # 1MB
+            count = _count_lines(filepath)
+            elapsed = time.perf_counter() - start_time
+            logger.debug(
+                "count_lines: %s - %d lines (Python method), time=%.3fs",
+                filepath,
+                count,
+                elapsed,
             )
-            if result.returncode == 0:
-                count = int(result.stdout.split()[0])
-
-                # wc -l counts newline characters, not lines
-                # If file doesn't end with newline, wc -l undercounts by 1
-                # Check last byte to match Python's iteration behavior
-                with open(filepath, "rb") as f:
-                    f.seek(0, os.SEEK_END)
-                    if f.tell() > 0:  # Non-empty file
-                        f.seek(-1, os.SEEK_END)
-                        last_byte = f.read(1)
-                        if last_byte != b"\n":
-                            count += 1
-
-                elapsed = time.time() - start_time
-                logger.debug(
-                    "count_lines: %s - %d lines (wc method), time=%.3fs",
-                    filepath,
-                    count,
-                    elapsed,
-                )
-                return count
+            return count
 
-            # Final fallback to Python counting
-            count = _count_lines(filepath)
-            elapsed = time.time() - start_time
+        # For larger files, use wc -l with adjustment for Python semantics
+        result = subprocess.run(
+            ["wc", "-l", filepath],
+            capture_output=True,
+            text=True,
+            check=False,
+            timeout=10,
+        )
+        if result.returncode == 0:
+            count = int(result.stdout.split()[0])
+
+            # wc -l counts newline characters, not lines
+            # If file doesn't end with newline, wc -l undercounts by 1
+            # Check last byte to match Python's iteration behavior
+            with open(filepath, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:  # Non-empty file
+                    f.seek(-1, os.SEEK_END)
+                    last_byte = f.read(1)
+                    if last_byte != b"\n":
+                        count += 1
+
+            elapsed = time.perf_counter() - start_time
             logger.debug(
-                "count_lines: %s - %d lines (fallback method), time=%.3fs",
+                "count_lines: %s - %d lines (wc method), time=%.3fs",
                 filepath,
                 count,
                 elapsed,
             )
             return count
-        except Exception as e:
-            logger.warning("Error counting lines in %s: %s", filepath, e)
-            return None
+
+        # Final fallback to Python counting
+        count = _count_lines(filepath)
+        elapsed = time.perf_counter() - start_time
+        logger.debug(
+            "count_lines: %s - %d lines (fallback method), time=%.3fs",
+            filepath,
+            count,
+            elapsed,
+        )
+        return count
+
+
+@functools.lru_cache(maxsize=512)
+def _count_lines_cached(filepath, file_size, mtime_ns):
+    # size and mtime are only part of the key, a modified file misses the cache
+    # pylint: disable=unused-argument, protected-access
+    return FileReader._count_lines_uncached(filepath, file_size)
+
+
+@functools.lru_cache(maxsize=64)
+def _line_index_cached(filepath, file_size, mtime_ns):
+    # size and mtime are only part of the key, a modified file gets a new index
+    # pylint: disable=unused-argument
+    return LineIndex()
@@ -1,5 +1,7 @@
+import functools
 import http.server
 import os
+import re
 import traceback
 from datetime import datetime
 from urllib.parse import parse_qs, quote, urlparse
@@ -11,24 +13,64 @@ from .constants import (
     VIEWABLE_TESTFILE_PREFIX,
 )
 from .file_reader import FileReader
-from .templates_loader import web_server_template_env
+from .templates_loader import web_server_templates
+
+
+@functools.lru_cache(maxsize=2048)
+def _breadcrumbs_for(path):
+    # Remove query parameters if present
+    path = urlparse(path).path
+
+    parts = path.strip(os.sep).split(os.sep)
+    breadcrumbs = [("Home", os.sep)]
+    link_path = os.sep
+    for part in parts:
+        if part:
+            link_path = os.path.join(link_path, part)
+            breadcrumbs.append((part, quote(link_path)))
+    # cached and shared between requests, so hand out an immutable copy
+    return tuple(breadcrumbs)
+
+
+@functools.lru_cache(maxsize=8192)
+def _format_minute(minute):
+    # dates are shown to the minute, files changed in the same minute share one
+    return datetime.fromtimestamp(minute * 60).strftime("%Y-%b-%d %H:%M")
 
 
 class CustomHandler(http.server.SimpleHTTPRequestHandler):
 
+    # Headers and body go out in separate writes, don't let Nagle hold the body
+    disable_nagle_algorithm = True
+    # Idle or stalled clients give up their handler thread after this long
+    timeout = 60
     viewable_testfile_prefix = VIEWABLE_TESTFILE_PREFIX
     viewable_testfile_extension = VIEWABLE_TESTFILE_EXTENSION
+    # Stands in for the file content, which is written out in its place
+    html_file_placeholder = "<!--html-file-content-->"
+    # api endpoint: name of the method handling it
+    api_endpoint_handlers = {
+        "health": "_handle_health_check",
+        "tail": "_handle_tail_endpoint",
+        "head": "_handle_head_endpoint",
+        "range": "_handle_range_endpoint",
+        "search": "_handle_search_endpoint",
+        "download": "_handle_download_endpoint",
+    }
+    api_endpoint_pattern = re.compile(
+        "__(%s)__" % "|".join(map(re.escape, api_endpoint_handlers))
+    )
 
     @staticmethod
     def _is_viewable(safe_path):
-        if os.path.isfile(safe_path):
-            if os.path.basename(safe_path).startswith(
-                CustomHandler.viewable_testfile_prefix
-            ):
-                return True
-            file_extension = os.path.splitext(safe_path)[-1]
-            return file_extension in CustomHandler.viewable_testfile_extension
-        return False
+        # check the name first, only paths that could be viewable cost a stat
+        if not os.path.basename(safe_path).startswith(
+            CustomHandler.viewable_testfile_prefix
+        ):
+            file_extension = os.path.splitext(safe_path)[1]
+            if file_extension not in CustomHandler.viewable_testfile_extension:
+                return False
+        return os.path.isfile(safe_path)
 
     def _get_file_line_size_tier(self, line_count):
         # Small files: less than 10K lines, show everything
@@ -40,15 +82,39 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         """Escape HTML special characters"""
         return content.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
+    def _send_html_headers(self, content_length):
+        self.send_response(200)
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(content_length))
+        self.end_headers()
+
+    def _send_html_response(self, response_content):
+        """Send a complete html page with its Content-Length"""
+        body = response_content.encode("utf-8")
+        self._send_html_headers(len(body))
+        self.wfile.write(body)
+
+    def _render_page_around_content(self, template_name, **kwargs):
+        """Render a page with a placeholder as file content
+
+        Returns:
+            tuple: (head, tail) - the encoded page before and after the content
+        """
+        template = web_server_templates[template_name]
+        response_content = template.render(
+            file_content=self.html_file_placeholder, **kwargs
+        )
+        head, tail = response_content.encode("utf-8").split(
+            self.html_file_placeholder.encode("utf-8"), 1
+        )
+        return head, tail
+
     def _render_template_response(self, template_name, **kwargs):
         """Render a template and send HTTP response"""
         try:
-            template = web_server_template_env.get_template(template_name)
+            template = web_server_templates[template_name]
             response_content = template.render(**kwargs)
-            self.send_response(200)
-            self.send_header("Content-type", "text/html; charset=utf-8")
-            self.end_headers()
-            self.wfile.write(response_content.encode("utf-8"))
+            self._send_html_response(response_content)
 
             logger.debug("Rendered template: %s for path: %s", template_name, self.path)
         except Exception as e:
@@ -75,13 +141,12 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             file_content, start_line = FileReader.try_multiple_encodings(
                 safe_path, FileReader.read_file_tail, line_count or 1000
             )
-            file_content = self._escape_html(file_content)
-
-            self._render_template_response(
+            # write the content between the page parts, the whole page is
+            # never joined into one string
+            head, tail = self._render_page_around_content(
                 "large_file_viewer.template",
                 path=self.path,
                 breadcrumbs=self._prepare_breadcrumbs(),
-                file_content=file_content,
                 file_size=file_size,
                 view_mode="full",
                 num_lines=line_count,
@@ -89,6 +154,11 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 start_line_number=start_line,
                 show_file_controls=True,
             )
+            body = self._escape_html(file_content).encode("utf-8")
+            self._send_html_headers(len(head) + len(body) + len(tail))
+            self.wfile.write(head)
+            self.wfile.write(body)
+            self.wfile.write(tail)
         except Exception as e:
             logger.error(
                 "Error loading medium file %s: %s", safe_path, e, exc_info=True
@@ -101,9 +171,8 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             )
             raise
 
-    def _load_large_file_options(self, safe_path, file_size):
+    def _load_large_file_options(self, safe_path, file_size, total_lines):
         logger.debug("Loading large file options: %s (size=%s)", safe_path, file_size)
-        total_lines = FileReader.count_lines(safe_path)
         self._render_template_response(
             "large_file_options.template",
             path=self.path,
@@ -112,30 +181,33 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             total_lines=total_lines,
         )
 
+    def _send_file(self, file, file_size):
+        """Copy file to the client with sendfile(2), not through memory"""
+        if file_size:
+            self.connection.sendfile(file, count=file_size)
+
     def _load_response_for_html_file(self, safe_path):
         logger.debug("Loading HTML file: %s", safe_path)
-        with open(safe_path, "r", encoding="utf-8") as file:
-            file_content = file.read()
-        template = web_server_template_env.get_template("html_file.template")
-        response_content = template.render(
+        head, tail = self._render_page_around_content(
+            "html_file.template",
             path=self.path,
             breadcrumbs=self._prepare_breadcrumbs(),
-            file_content=file_content,
         )
-        self.send_response(200)
-        self.send_header("Content-type", "text/html; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(response_content.encode("utf-8"))
+        with open(safe_path, "rb") as file:
+            file_size = os.fstat(file.fileno()).st_size
+            self._send_html_headers(len(head) + file_size + len(tail))
+            self.wfile.write(head)
+            self._send_file(file, file_size)
+            self.wfile.write(tail)
 
     def _load_response_with_file_content(self, safe_path):
         try:
             logger.info("Loading file: %s", safe_path)
-            file_size = os.path.getsize(safe_path)
-            line_count = FileReader.count_lines(safe_path)
+            file_size, line_count = FileReader.get_size_and_line_count(safe_path)
             tier = self._get_file_line_size_tier(line_count)
 
             if tier == "large":
-                self._load_large_file_options(safe_path, file_size)
+                self._load_large_file_options(safe_path, file_size, line_count)
             else:
                 self._load_non_large_file(safe_path, file_size, line_count)
 
@@ -153,14 +225,16 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             self.send_error(500, f"Internal server error: {type(e).__name__}")
 
     def format_size(self, size):
-        for unit in ["B", "KiB", "MiB", "GiB"]:
-            if size < 1024.0:
-                break
-            size /= 1024.0
-        return f"{size:.1f} {unit}"
+        if size < 1024:
+            return f"{size:.1f} B"
+        if size < 1024 * 1024:
+            return f"{size / 1024:.1f} KiB"
+        if size < 1024 * 1024 * 1024:
+            return f"{size / (1024 * 1024):.1f} MiB"
+        return f"{size / (1024 * 1024 * 1024):.1f} GiB"
 
     def format_date(self, timestamp):
-        return datetime.fromtimestamp(timestamp).strftime("%Y-%b-%d %H:%M")
+        return _format_minute(int(timestamp // 60))
 
     def _prepare_breadcrumbs(self, path=None):
         """Prepare breadcrumb navigation from a path
@@ -170,49 +244,39 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         """
         if path is None:
             path = self.path
-
-        # Remove query parameters if present
-        path = urlparse(path).path
-
-        parts = path.strip(os.sep).split(os.sep)
-        breadcrumbs = [("Home", os.sep)]
-        link_path = os.sep
-        for part in parts:
-            if part:
-                link_path = os.path.join(link_path, part)
-                breadcrumbs.append((part, quote(link_path)))
-        return breadcrumbs
+        return _breadcrumbs_for(path)
 
     def _prepare_directory_meta(self, path):
-        dir_list = os.listdir(path)
         directory_meta = []
-        for name in dir_list:
-            if name.startswith("."):
-                continue
-            full_path = os.path.join(path, name)
-            display_name = name
-
-            if os.path.isdir(full_path):
-                display_name += os.sep
-                icon_class = "folder"
-                size = None
-                mtime = os.path.getmtime(full_path)
-            else:
-                icon_class = "file"
-                size = self.format_size(os.path.getsize(full_path))
-                mtime = os.path.getmtime(full_path)
-            date = self.format_date(mtime)
-
-            directory_meta.append(
-                {
-                    "display_name": display_name,
-                    "link": quote(display_name),
-                    "icon": icon_class,
-                    "size": size,
-                    "date": date,
-                    "mtime": mtime,
-                }
-            )
+        # scandir entries come with their type and one cached stat each
+        with os.scandir(path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith("."):
+                    continue
+                display_name = name
+                st = entry.stat()
+
+                if entry.is_dir():
+                    display_name += os.sep
+                    icon_class = "folder"
+                    size = None
+                else:
+                    icon_class = "file"
+                    size = self.format_size(st.st_size)
+                mtime = st.st_mtime
+                date = self.format_date(mtime)
+
+                directory_meta.append(
+                    {
+                        "display_name": display_name,
+                        "link": quote(display_name),
+                        "icon": icon_class,
+                        "size": size,
+                        "date": date,
+                        "mtime": mtime,
+                    }
+                )
         # Sort by modification time, newest first
         directory_meta.sort(key=lambda x: x["mtime"], reverse=True)
         return directory_meta
@@ -221,16 +285,13 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         try:
             logger.debug("Listing directory: %s", path)
             directory_meta = self._prepare_directory_meta(path)
-            template = web_server_template_env.get_template("index.template")
+            template = web_server_templates["index.template"]
             response_content = template.render(
                 path=self.path,
                 breadcrumbs=self._prepare_breadcrumbs(),
                 directory_list=directory_meta,
             )
-            self.send_response(200)
-            self.send_header("Content-type", "text/html; charset=utf-8")
-            self.end_headers()
-            self.wfile.write(response_content.encode("utf-8"))
+            self._send_html_response(response_content)
         except PermissionError:
             logger.error("Permission denied listing directory: %s", path)
             self.send_error(403, "No permission to list directory")
@@ -255,7 +316,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         try:
             logger.info("API tail: %s - lines=%s", safe_path, params.get("lines", 1000))
 
-            total_lines = FileReader.count_lines(safe_path)
+            file_size, total_lines = FileReader.get_size_and_line_count(safe_path)
             requested_lines = int(params.get("lines", 1000))
             num_lines = (
                 min(total_lines, requested_lines) if total_lines else requested_lines
@@ -265,7 +326,6 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 safe_path, FileReader.read_file_tail, num_lines
             )
             file_content = self._escape_html(file_content)
-            file_size = os.path.getsize(safe_path)
 
             self._render_template_response(
                 "large_file_viewer.template",
@@ -288,7 +348,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         try:
             logger.info("API head: %s - lines=%s", safe_path, params.get("lines", 1000))
 
-            total_lines = FileReader.count_lines(safe_path)
+            file_size, total_lines = FileReader.get_size_and_line_count(safe_path)
             requested_lines = int(params.get("lines", 1000))
             num_lines = (
                 min(total_lines, requested_lines) if total_lines else requested_lines
@@ -298,7 +358,6 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 safe_path, FileReader.read_file_head, num_lines
             )
             file_content = self._escape_html(file_content)
-            file_size = os.path.getsize(safe_path)
 
             self._render_template_response(
                 "large_file_viewer.template",
@@ -326,14 +385,13 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 "API range: %s - lines %s-%s", safe_path, start_line, requested_end
             )
 
-            total_lines = FileReader.count_lines(safe_path)
+            file_size, total_lines = FileReader.get_size_and_line_count(safe_path)
             end_line = min(total_lines, requested_end) if total_lines else requested_end
 
             file_content, line_start = FileReader.try_multiple_encodings(
                 safe_path, FileReader.read_file_range, start_line, end_line
             )
             file_content = self._escape_html(file_content)
-            file_size = os.path.getsize(safe_path)
 
             self._render_template_response(
                 "large_file_viewer.template",
@@ -371,8 +429,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             else:
                 search_result = self._escape_html(search_result)
 
-            file_size = os.path.getsize(safe_path)
-            total_lines = FileReader.count_lines(safe_path)
+            file_size, total_lines = FileReader.get_size_and_line_count(safe_path)
 
             self._render_template_response(
                 "large_file_viewer.template",
@@ -398,10 +455,8 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             self.send_error(500, str(e))
 
     def extract_api_endpoint(self):
-        for api in self.api_endpoint_handlers:
-            if f"__{api}__" in self.path:
-                return api
-        return None
+        m = self.api_endpoint_pattern.search(self.path)
+        return m.group(1) if m else None
 
     def _handle_health_check(self):
         logger.debug("API health check")
@@ -416,16 +471,16 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             logger.info("API download: %s", safe_path)
 
             with open(safe_path, "rb") as file:
-                content = file.read()
-            self.send_response(200)
-            self.send_header(
-                "Content-disposition",
-                f"attachment; filename={os.path.basename(safe_path)}",
-            )
-            self.send_header("Content-length", str(len(content)))
-            self.send_header("Content-type", "application/octet-stream")
-            self.end_headers()
-            self.wfile.write(content)
+                file_size = os.fstat(file.fileno()).st_size
+                self.send_response(200)
+                self.send_header(
+                    "Content-disposition",
+                    f"attachment; filename={os.path.basename(safe_path)}",
+                )
+                self.send_header("Content-length", str(file_size))
+                self.send_header("Content-type", "application/octet-stream")
+                self.end_headers()
+                self._send_file(file, file_size)
 
         except Exception as e:
             logger.error("Error in download endpoint: %s", e, exc_info=True)
@@ -434,25 +489,15 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             )
             self.send_error(500, str(e))
 
-    @property
-    def api_endpoint_handlers(self):
-        return {
-            "health": self._handle_health_check,
-            "tail": self._handle_tail_endpoint,
-            "head": self._handle_head_endpoint,
-            "range": self._handle_range_endpoint,
-            "search": self._handle_search_endpoint,
-            "download": self._handle_download_endpoint,
-        }
-
     def api_handling(self, api_endpoint, params):
         logger.debug("API request: %s - params=%s", api_endpoint, params)
 
-        handler_func = self.api_endpoint_handlers.get(api_endpoint)
-        if not handler_func:
+        handler_name = self.api_endpoint_handlers.get(api_endpoint)
+        if not handler_name:
             logger.error("API endpoint not found: %s", api_endpoint)
             self.send_error(404, "API endpoint not found")
             return
+        handler_func = getattr(self, handler_name)
 
         # Health check doesn't require a file path
         if api_endpoint == "health":
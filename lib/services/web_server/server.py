@@ -1,6 +1,8 @@
+import collections
 import http.server
 import logging
 import os
+import select
 import signal
 import socket
 import socketserver
@@ -21,6 +23,32 @@ class ThreadedHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
 
     daemon_threads = True  # Threads will terminate when main thread exits
     request_queue_size = 10  # Limit concurrent connections
+    max_handler_threads = 32  # Further requests wait in the listen backlog
+    handler_slot_timeout = 5.0  # Seconds to wait for a free handler thread
+
+    def __init__(self, *args, **kwargs):
+        self._handler_slots = threading.BoundedSemaphore(self.max_handler_threads)
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        # Bound the number of handler threads instead of one per connection,
+        # but don't stall the accept loop (and shutdown) when all are busy
+        # pylint: disable=consider-using-with
+        if not self._handler_slots.acquire(timeout=self.handler_slot_timeout):
+            logger.warning("All handler threads busy, dropping %s", client_address)
+            self.shutdown_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._handler_slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._handler_slots.release()
 
 
 class WebServer:
@@ -38,7 +66,6 @@ class WebServer:
         """Create and configure the HTTP server"""
         server_address = (self.ip, self.port)
         httpd = ThreadedHTTPServer(server_address, CustomHandler)
-        httpd.timeout = 1.0  # Timeout for serve_forever loop to check shutdown
         logger.debug("HTTP server created: %s", server_address)
         return httpd
 
@@ -49,9 +76,7 @@ class WebServer:
             self.httpd = self._create_server()
             logger.info("HTTP server started on port %s", self.port)
 
-            while not self.shutdown_flag.is_set():
-                self.httpd.handle_request()
-            self.httpd.serve_forever()
+            self.httpd.serve_forever(poll_interval=1.0)
         except OSError as e:
             logger.error("Unable to start webserver: %s", e)
             raise
@@ -69,7 +94,9 @@ class WebServer:
             logger.info("Shutting down web server...")
             self.shutdown_flag.set()
             if self.httpd:
-                self.httpd.shutdown()
+                # Signal handlers run this on the serving thread, where
+                # httpd.shutdown() would wait forever for serve_forever to return
+                threading.Thread(target=self.httpd.shutdown, daemon=True).start()
 
     def _is_process_running(self, pid):
         """Check if a process with given PID is running"""
@@ -80,6 +107,32 @@ class WebServer:
         except (OSError, ProcessLookupError):
             return False
 
+    def _wait_for_process_exit(self, pid, timeout):
+        """Wait up to timeout seconds for a process to exit
+
+        Returns:
+            bool: True if the process is gone
+        """
+        try:
+            # a pidfd turns readable as soon as the process exits, linux 5.3+
+            pidfd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except (AttributeError, OSError):
+            # no pidfd_open (python < 3.9 or older kernel), poll for the pid
+            deadline = time.monotonic() + timeout
+            while self._is_process_running(pid):
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.5)
+            return True
+        try:
+            poller = select.poll()
+            poller.register(pidfd, select.POLLIN)
+            return bool(poller.poll(timeout * 1000))
+        finally:
+            os.close(pidfd)
+
     def _is_port_available(self):
         # Try to create a socket on the specified port
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
@@ -93,21 +146,29 @@ class WebServer:
 
     def _get_pid_by_port(self):
         """Find the PID of the process listening on the server's port."""
-        for conn in psutil.net_connections(kind="inet"):
-            if conn.status == "LISTEN" and conn.laddr.port == self.port:
-                try:
-                    proc = psutil.Process(conn.pid)
-                    # Be extra sure by checking if the process name matches
-                    if self.process_name in proc.name():
+        # only look at the sockets of our own processes, psutil.net_connections
+        # resolves the owner of every socket on the host which is slow on a busy
+        # box
+        for proc in psutil.process_iter(["pid", "name"]):
+            if self.process_name not in (proc.info["name"] or ""):
+                continue
+            try:
+                # Process.connections was renamed to net_connections in psutil 6
+                connections = getattr(proc, "net_connections", proc.connections)
+                for conn in connections(kind="inet"):
+                    if (
+                        conn.status == psutil.CONN_LISTEN
+                        and conn.laddr.port == self.port
+                    ):
                         logger.debug(
                             "Found process %s (PID %s) listening on port %s",
                             self.process_name,
-                            conn.pid,
+                            proc.pid,
                             self.port,
                         )
-                        return conn.pid
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+                        return proc.pid
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
         return None
 
     def _is_webserver_exists(self):
@@ -157,6 +218,10 @@ class WebServer:
 
         # pylint: disable=unused-argument
         def signal_handler(signum, frame):
+            if server_instance.shutdown_flag.is_set():
+                # the graceful shutdown is stuck, a second signal forces it
+                logger.warning("Received signal %s again, exiting immediately", signum)
+                os._exit(1)  # pylint: disable=protected-access
             logger.info("Received signal %s, initiating graceful shutdown", signum)
             server_instance.shutdown()
 
@@ -164,17 +229,18 @@ class WebServer:
         signal.signal(signal.SIGINT, signal_handler)
 
     def _run_with_watchdog(self, max_restarts=5, restart_window=300):
-        restart_times = []
+        restart_times = collections.deque()
         consecutive_failures = 0
         logger.info(
             "Starting watchdog: max_restarts=%s, restart_window=%ss",
             max_restarts,
             restart_window,
         )
-        while True:
+        while not self.shutdown_flag.is_set():
             # Clean up old restart times outside the window
             cutoff = time.time() - restart_window
-            restart_times = [t for t in restart_times if t > cutoff]
+            while restart_times and restart_times[0] <= cutoff:
+                restart_times.popleft()
 
             # Check if we've exceeded max restarts
             if len(restart_times) >= max_restarts:
@@ -224,7 +290,9 @@ class WebServer:
                 # Exponential backoff for restart delay
                 delay = min(5 * (2 ** (consecutive_failures - 1)), 60)
                 logger.info("Waiting %d seconds before restart...", delay)
-                time.sleep(delay)
+                # a shutdown signal ends the wait instead of a restart
+                if self.shutdown_flag.wait(delay):
+                    break
 
         logger.info("Watchdog shutting down")
 
@@ -304,19 +372,20 @@ class WebServer:
             logger.error("Failed to send SIGKILL to PID %d: %s", pid, e)
             return
 
-        # Poll for process termination and port availability
-        stop_time = time.time() + 10  # 10-second timeout
-        while time.time() < stop_time:
-            if not self._is_process_running(pid):
-                logger.info("Web server process (PID: %d) has terminated.", pid)
-                time.sleep(1)
+        timeout = 10
+        deadline = time.monotonic() + timeout
+        if self._wait_for_process_exit(pid, timeout):
+            logger.info("Web server process (PID: %d) has terminated.", pid)
+            while True:
                 if self._is_port_available():
                     logger.info("Port %d is now free. Shutdown successful.", self.port)
                     return
+                if time.monotonic() >= deadline:
+                    break
                 logger.warning(
                     "Process terminated, but port %d is still in use.", self.port
                 )
-            time.sleep(0.5)
+                time.sleep(0.5)
 
         logger.warning(
             (
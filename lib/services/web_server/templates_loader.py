@@ -41,4 +41,10 @@ _TEMPLATES = _load_templates_from_disk()
 
 # Use DictLoader instead of FileSystemLoader
 # DictLoader keeps templates in memory, no disk access needed
-web_server_template_env = Environment(loader=DictLoader(_TEMPLATES))
+# The in-memory sources never change, so skip the up-to-date check on lookups
+web_server_template_env = Environment(loader=DictLoader(_TEMPLATES), auto_reload=False)
+
+# Compile all templates up front too, requests only look them up by name
+web_server_templates = {
+    name: web_server_template_env.get_template(name) for name in _TEMPLATES
+}
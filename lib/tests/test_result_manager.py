@@ -0,0 +1,52 @@
+"""
+Tests for lib/services/result_manager.py.
+"""
+
+# pylint: disable=redefined-outer-name  # Pytest fixtures intentionally shadow fixture names
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from lib.services.result_manager import ScriptResultManager
+
+
+@pytest.fixture
+def result_manager():
+    """ScriptResultManager for a stub script."""
+    return ScriptResultManager(MagicMock())
+
+
+class TestScriptResultManager:
+    """Test suite for ScriptResultManager."""
+
+    def test_report_failure_keeps_reported_summary_results(
+        self, result_manager, mocker
+    ):
+        """Test qaids reported before a failure still reach the summary."""
+        mock_summary = mocker.patch("lib.services.result_manager.summary")
+        mocker.patch("lib.services.result_manager.oriole")
+        result_manager.add_qaid_expect_result("1001", True, 3, "output")
+        result_manager.add_qaid_expect_result("1002", True, 5, "output")
+        result_manager.report_qaid_and_dev_map = {"1001": "FGT_A", "1002": "FGT_B"}
+
+        with pytest.raises(KeyError):
+            result_manager.report_script_result_to_oriole({"FGT_A": {}})
+
+        (updates,), _ = mock_summary.batch_update_testcases.call_args
+        assert [qaid for qaid, *_ in updates] == ["1001"]
+
+    def test_check_cli_error_records_leftmost_error(self, result_manager):
+        """Test the first CLI error in a command output is recorded."""
+        output = "Attribute 'name' Must be set\nCommand fail. Return code -61\n"
+        result_manager.check_cli_error(12, "end", output)
+
+        assert result_manager.cli_errors == [
+            (12, "end", "Attribute 'name' Must be set")
+        ]
+
+    def test_check_cli_error_ignores_clean_output(self, result_manager):
+        """Test a command output without CLI errors records nothing."""
+        result_manager.check_cli_error(12, "end", "FGT (global) # ")
+
+        assert result_manager.cli_errors == []
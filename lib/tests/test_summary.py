@@ -0,0 +1,201 @@
+"""
+Tests for the summary.html render throttling in lib/services/_summary.py.
+"""
+
+# pylint: disable=redefined-outer-name  # Pytest fixtures intentionally shadow fixture names
+# pylint: disable=protected-access  # Tests need to access protected members
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from lib.services import _summary
+
+
+@pytest.fixture
+def summary_file(temp_dir):
+    """Path the summary under test renders to."""
+    return temp_dir / "summary.html"
+
+
+@pytest.fixture
+def clock(mocker):
+    """Controllable time.monotonic for the render throttle."""
+    mock_time = mocker.patch("lib.services._summary.time")
+    mock_time.monotonic.return_value = 1000.0
+    return mock_time
+
+
+@pytest.fixture
+def summary(mocker, summary_file):
+    """Summary rendering a stub page to summary_file, without atexit hooks."""
+    mocker.patch("lib.services._summary.atexit")
+    mocker.patch("lib.services._summary.get_output_filename", return_value=summary_file)
+    instance = _summary.Summary()
+    stream = MagicMock()
+    stream.dump.side_effect = lambda f: f.write("<html></html>")
+    mocker.patch.object(instance, "_render", return_value=stream)
+    mocker.patch.object(instance, "_print")
+    return instance
+
+
+class TestSummaryRender:
+    """Test suite for throttled summary.html renders."""
+
+    def test_first_mutation_renders(self, summary, summary_file):
+        """Test the first mutation publishes summary.html right away."""
+        summary.add_testcase("1001", "testcase/1001.txt")
+
+        assert summary._render.call_count == 1
+        assert summary_file.read_text() == "<html></html>"
+        assert not summary._dirty
+
+    def test_throttled_mutation_does_not_render(self, summary, clock):
+        """Test a mutation within FLUSH_INTERVAL of the last render is deferred."""
+        summary.add_testcase("1001", "testcase/1001.txt")
+        clock.monotonic.return_value += summary.FLUSH_INTERVAL / 2
+        summary.add_testcase("1002", "testcase/1002.txt")
+
+        assert summary._render.call_count == 1
+        assert summary._dirty
+
+        clock.monotonic.return_value += summary.FLUSH_INTERVAL
+        summary.add_testcase("1003", "testcase/1003.txt")
+
+        assert summary._render.call_count == 2
+        assert not summary._dirty
+
+    def test_mutation_during_render_does_not_render(self, summary, clock):
+        """Test a mutation made while a render is running defers to a later one."""
+
+        def dump(f):
+            clock.monotonic.return_value += summary.FLUSH_INTERVAL
+            summary.add_testcase("1002", "testcase/1002.txt")
+            f.write("<html></html>")
+
+        summary._render.return_value.dump.side_effect = dump
+        summary.add_testcase("1001", "testcase/1001.txt")
+
+        assert summary._render.call_count == 1
+        assert summary._dirty
+
+    def test_failed_render_keeps_summary_dirty(self, summary):
+        """Test a failed render leaves its changes for the next flush."""
+        summary._render.side_effect = RuntimeError("render")
+
+        with pytest.raises(RuntimeError):
+            summary.add_testcase("1001", "testcase/1001.txt")
+
+        assert summary._dirty
+        assert summary._last_flush == float("-inf")
+
+    def test_update_testscript_forces_render(self, summary):
+        """Test script status changes are published despite the throttle."""
+        summary.add_testcase("1001", "testcase/1001.txt")
+        summary.update_testscript("script1", _summary.TestStatus.TESTING)
+
+        assert summary._render.call_count == 2
+
+    def test_show_summary_forces_render(self, summary):
+        """Test show_summary publishes the final page despite the throttle."""
+        summary.add_testcase("1001", "testcase/1001.txt")
+        summary.show_summary()
+
+        assert summary._render.call_count == 2
+        summary._print.assert_called_once()
+
+    def test_batch_update_renders_at_most_once(self, summary, clock):
+        """Test a batch of testcase results triggers a single render."""
+        qaids = ("1001", "1002", "1003")
+        for qaid in qaids:
+            summary.add_testcase(qaid, f"testcase/{qaid}.txt")
+        clock.monotonic.return_value += summary.FLUSH_INTERVAL
+        summary._render.reset_mock()
+
+        summary.batch_update_testcases(
+            [(qaid, [(True, 1, "expect", "output")], False) for qaid in qaids]
+        )
+        assert summary._render.call_count == 1
+
+        summary.batch_update_testcases([])
+        assert summary._render.call_count == 1
+
+    def test_generate_leaves_no_tmp_file(self, summary, summary_file):
+        """Test summary.html is published without leaving the tmp file behind."""
+        summary._generate()
+
+        assert summary_file.read_text() == "<html></html>"
+        assert list(summary_file.parent.iterdir()) == [summary_file]
+
+    def test_generate_failure_leaves_no_tmp_file(self, summary, summary_file):
+        """Test a failed render keeps the old page and removes the tmp file."""
+        summary_file.write_text("old")
+        summary._render.return_value.dump.side_effect = RuntimeError("render")
+
+        with pytest.raises(RuntimeError):
+            summary._generate()
+
+        assert summary_file.read_text() == "old"
+        assert list(summary_file.parent.iterdir()) == [summary_file]
+
+    def test_overlapping_generates_do_not_collide(self, summary, summary_file):
+        """Test renders running at the same time each publish their own page."""
+        barrier = threading.Barrier(2, timeout=5)
+        errors = []
+
+        def dump(f):
+            f.write("<html></html>")
+            barrier.wait()  # both renders have their temp file open
+
+        def generate():
+            try:
+                summary._generate()
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(e)
+
+        summary._render.return_value.dump.side_effect = dump
+        threads = [threading.Thread(target=generate) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert summary_file.read_text() == "<html></html>"
+        assert list(summary_file.parent.iterdir()) == [summary_file]
+
+    def test_update_reported_updates_classified_cache(self, summary):
+        """Test update_reported refreshes the memoized classified result."""
+        summary.add_testcase("1001", "testcase/1001.txt")
+        summary.update_testcase("1001", [(False, 3, "expect", "output")], False)
+        assert summary._classify_testcases()[0]["reported"] is False
+
+        summary.update_reported("1001")
+
+        assert summary.testcases["1001"].reported is True
+        assert summary._classify_testcases()[0]["reported"] is True
+
+    def test_exit_flushes_deferred_render(self, summary, clock):
+        """Test the atexit hook publishes a render deferred by the throttle."""
+        summary.add_testcase("1001", "testcase/1001.txt")
+        clock.monotonic.return_value += summary.FLUSH_INTERVAL / 2
+        summary.add_testcase("1002", "testcase/1002.txt")
+
+        summary._flush_at_exit()
+
+        assert summary._render.call_count == 2
+        assert not summary._dirty
+
+    def test_exit_skips_flush_without_prior_render(self, summary, mocker):
+        """Test the atexit hook does nothing if no render ever succeeded."""
+        mock_logger = mocker.patch("lib.services._summary.logger")
+        summary._render.side_effect = RuntimeError("not set up")
+        with pytest.raises(RuntimeError):
+            summary.add_testcase("1001", "testcase/1001.txt")
+        summary._render.reset_mock()
+
+        summary._flush_at_exit()
+
+        summary._render.assert_not_called()
+        mock_logger.exception.assert_not_called()
@@ -145,6 +145,28 @@ class TestWebServer:
         result = mock_sock.connect_ex.return_value
         assert result == 1  # Port is free
 
+    def test_busy_handler_slots_drop_request(self, mocker):
+        """Test a request is dropped instead of blocking when all slots are busy."""
+        from lib.services.web_server.server import ThreadedHTTPServer
+
+        server = ThreadedHTTPServer(("127.0.0.1", 0), MagicMock(), False)
+        server.handler_slot_timeout = 0.01
+        mock_shutdown_request = mocker.patch.object(server, "shutdown_request")
+        mock_process = mocker.patch(
+            "socketserver.ThreadingMixIn.process_request", autospec=True
+        )
+        # take every handler slot as busy connections would
+        # pylint: disable=protected-access,consider-using-with
+        for _ in range(server.max_handler_threads):
+            assert server._handler_slots.acquire(blocking=False)
+
+        request = MagicMock()
+        server.process_request(request, ("127.0.0.1", 1))
+
+        mock_shutdown_request.assert_called_once_with(request)
+        mock_process.assert_not_called()
+        server.server_close()
+
 
 class TestCustomHandler:
     """Test suite for CustomHandler class."""
@@ -304,6 +326,51 @@ class TestFileReader:
         # Returns string or None
         assert results is None or isinstance(results, str)
 
+    def test_search_in_file_with_invalid_utf8(self, temp_dir, mocker):
+        """Test matches after non-utf-8 bytes are still returned."""
+        from lib.services.web_server.file_reader import FileReader
+
+        test_file = temp_dir / "mixed.log"
+        test_file.write_bytes(b"ok line\nbad \xe9\xff line\nlast line\n")
+
+        results = FileReader.search_in_file(str(test_file), pattern="line")
+
+        assert results == "1:ok line\n2:bad \ufffd\ufffd line\n3:last line\n"
+
+    def test_search_in_file_truncates_large_output(self, temp_dir, mocker):
+        """Test search output is cut at whole lines past MAX_VIEWABLE_SIZE."""
+        from lib.services.web_server.file_reader import FileReader
+
+        mocker.patch("lib.services.web_server.file_reader.MAX_VIEWABLE_SIZE", 1000)
+        test_file = temp_dir / "many.log"
+        test_file.write_text("".join(f"match {i}\n" for i in range(1, 100001)))
+
+        results = FileReader.search_in_file(str(test_file), pattern="match")
+
+        lines = results.splitlines()
+        assert lines[0] == "1:match 1"
+        assert lines[-2] == f"{len(lines) - 1}:match {len(lines) - 1}"
+        assert lines[-1].startswith("[Search output truncated at 1000 bytes")
+
+    def test_read_file_range_uses_line_index(self, temp_dir, mocker):
+        """Test ranges read through the line index match plain iteration."""
+        from lib.services.web_server.file_reader import FileReader
+
+        mocker.patch("lib.services.web_server.file_reader.LINE_INDEX_BLOCK_SIZE", 16)
+        test_file = temp_dir / "range.log"
+        test_file.write_bytes(
+            b"".join(
+                b"Line %d\r\n" % i if i % 3 else b"L%d\r" % i for i in range(1, 300)
+            )
+        )
+        with open(test_file, "r", encoding="utf-8") as f:
+            expected = [line.rstrip("\n") for line in f][199:210]
+
+        content, start_line = FileReader.read_file_range(str(test_file), 200, 210)
+
+        assert content == "\n".join(expected)
+        assert start_line == 200
+
     def test_count_lines_small_file(self, temp_dir, mocker):
         """Test line counting for small files."""
         from lib.services.web_server.file_reader import FileReader
@@ -326,6 +393,18 @@ class TestFileReader:
 
         assert count >= 1000
 
+    def test_count_lines_refreshes_on_change(self, temp_dir, mocker):
+        """Test cached line counts are refreshed once the file changes."""
+        from lib.services.web_server.file_reader import FileReader
+
+        log_file = temp_dir / "growing.log"
+        log_file.write_text("Line 1\nLine 2\n")
+        assert FileReader.get_size_and_line_count(str(log_file)) == (14, 2)
+
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write("Line 3")
+        assert FileReader.get_size_and_line_count(str(log_file)) == (20, 3)
+
     def test_encoding_detection(self, temp_dir, mocker):
         """Test encoding detection for files."""
         from lib.services.web_server.file_reader import FileReader
@@ -352,6 +431,39 @@ class TestFileReader:
         assert isinstance(result, tuple)
         assert len(result) == 2
 
+    def test_read_file_tail_content(self, temp_dir, mocker):
+        """Test tail returns the last lines and their starting line number."""
+        from lib.services.web_server.file_reader import FileReader
+
+        test_file = temp_dir / "tail.txt"
+        test_file.write_text(
+            "".join(f"Line {i} é\n" for i in range(1, 1001)), encoding="utf-8"
+        )
+
+        content, start_line = FileReader.read_file_tail(str(test_file), num_lines=3)
+
+        assert content == "Line 998 é\nLine 999 é\nLine 1000 é"
+        assert start_line == 998
+
+    def test_read_backwards_ignores_appended_bytes(self, temp_dir, mocker):
+        """Test the tail is cut at the measured size of a growing log."""
+        from lib.services.web_server.file_reader import FileReader
+
+        test_file = temp_dir / "growing.log"
+        test_file.write_bytes(b"first\nsecond\n")
+        file_size = test_file.stat().st_size
+        with open(test_file, "ab") as f:
+            f.write(b"thi")  # appended after the size was measured
+
+        # pylint: disable=protected-access
+        with open(test_file, "rb") as f:
+            lines, bytes_read = FileReader._read_backwards_until_lines(
+                f, file_size, 2, "utf-8"
+            )
+
+        assert lines == ["first", "second"]
+        assert bytes_read == file_size
+
 
 class TestWebServerIntegration:
     """Integration tests for web server."""